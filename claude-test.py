@@ -1,11 +1,32 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import csv
+import functools
+import hashlib
+import io
 import json
+import string
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import st_folium
-import pandas as pd
-from datetime import datetime
-import s2sphere
+import numpy as np
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from shapely.geometry import mapping, shape
+
+# Prefer the compiled S2 bindings; fall back to the pure-Python port
+try:
+    import s2geometry
+except ImportError:
+    s2geometry = None
+    import s2sphere
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Agri API Landscape Monitor")
@@ -45,10 +66,68 @@ CROP_COLORS = {
     "WHEAT": "#F4A460"
 }
 
+@st.cache_resource
+def legend_html():
+    """Crop legend markup; depends only on CROP_COLORS."""
+    return '''
+    <div style="position: fixed; 
+                bottom: 50px; right: 50px; width: 200px; 
+                background-color: white; border:2px solid grey; z-index:9999; 
+                font-size:14px; padding: 10px">
+    <h4 style="margin-top:0;">Crop Legend</h4>
+    ''' + "".join(
+        f'<p><span style="background-color:{color}; width:20px; height:20px; display:inline-block; border:1px solid black;"></span> {crop.replace("_", " ").title()}</p>'
+        for crop, color in CROP_COLORS.items()
+    ) + '</div>'
+
+def _crop_css_class(crop_key):
+    return "crop-" + crop_key.lower().replace("_", "-")
+
+# Fields are tagged with a crop class and colored by one stylesheet instead of
+# an inline fill per feature. Crops missing from CROP_COLORS use crop-other.
+@st.cache_resource
+def crop_css():
+    """Stylesheet mapping each crop class to its CROP_COLORS fill."""
+    return "<style>" + "".join(
+        f".{_crop_css_class(crop)} {{ fill: {color}; }}"
+        for crop, color in CROP_COLORS.items()
+    ) + ".crop-other { fill: #666666; }</style>"
+
+# Max characters of the raw API response shown inline
+RAW_JSON_PREVIEW_CHARS = 200_000
+
 # --- Helper Functions ---
 
-def fetch_agri_data(api_key, cell_id):
-    """Calls the Agricultural Monitoring API."""
+def json_loads(data):
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps_pretty(obj):
+    """Serialize to 2-space indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+@st.cache_resource
+def _http_session():
+    """Shared pooled session that retries transient gateway errors with backoff."""
+    # Held via cache_resource: module-level objects are rebuilt on every rerun.
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),  # monitorLandscape is a read-only query
+        raise_on_status=False,
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    return session
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _post_monitor_landscape(api_key, cell_id):
+    """Posts to the Agricultural Monitoring API, cached per (api_key, cell_id)."""
     url = f"https://agriculturalunderstanding.googleapis.com/v1:monitorLandscape?key={api_key}"
     
     payload = {
@@ -58,123 +137,201 @@ def fetch_agri_data(api_key, cell_id):
     }
     headers = {"Content-Type": "application/json"}
     
+    resp = _http_session().post(url, json=payload, headers=headers, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+def fetch_agri_data(api_key, cell_id):
+    """Calls the Agricultural Monitoring API."""
+    # Spinner and error reporting live outside the cached call: failures raise
+    # (and are never cached), and repeat fetches of a cell skip the spinner.
     try:
         with st.spinner("Fetching data from API..."):
-            resp = requests.post(url, json=payload, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
+            return _post_monitor_landscape(api_key, cell_id)
     except requests.exceptions.RequestException as e:
         st.error(f"API Request Failed: {e}")
         return None
 
+_MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+@functools.lru_cache(maxsize=1024)
 def timestamp_to_month_year(timestamp):
-    """Convert Unix timestamp to 'Month Year' format."""
+    """Convert Unix timestamp to 'Month Year' format (UTC)."""
     if timestamp and timestamp > 0:
-        dt = datetime.fromtimestamp(timestamp)
-        return dt.strftime("%B %Y")
+        t = time.gmtime(timestamp)
+        return f"{_MONTHS[t.tm_mon - 1]} {t.tm_year}"
     return "N/A"
 
+# Simplification tolerance in degrees (~1 m), invisible at the zoom-13 view.
+SIMPLIFY_TOLERANCE = 1e-5
+
+def simplify_features(features, tol=SIMPLIFY_TOLERANCE):
+    """Simplify feature geometries in place to cut vertices sent to the browser."""
+    for feature in features:
+        geometry = feature.get("geometry")
+        if geometry:
+            feature["geometry"] = mapping(shape(geometry).simplify(tol, preserve_topology=True))
+    return features
+
+@st.cache_data(show_spinner=False)
+def _load_geojson(geojson_str):
+    """Decode and simplify the embedded GeoJSON string, cached on the raw string."""
+    geojson_data = json_loads(geojson_str)
+    simplify_features(geojson_data.get("features", []))
+    return geojson_data
+
 def parse_geojson_data(api_response):
     """Parse the API response and extract GeoJSON features."""
     try:
         monitored_landscape = api_response.get("monitoredLandscape", {})
         geojson_str = monitored_landscape.get("geojson", "{}")
-        geojson_data = json.loads(geojson_str)
+        geojson_data = _load_geojson(geojson_str)
         return geojson_data
     except Exception as e:
         st.error(f"Error parsing GeoJSON: {e}")
         return None
 
-def get_latest_time_period(features):
-    """Get the latest time period from features."""
-    latest_period = None
-    max_timestamp = 0
+@dataclass
+class FeatureSummary:
+    """Aggregates collected in a single walk over the fetched features."""
+    latest_period: Optional[dict] = None
+    total_area: float = 0.0
+    avg_area: float = 0.0
+    # Latest prediction per feature (None if it has none), aligned with the
+    # features list so fields with missing or duplicate ids stay distinct.
+    latest_preds: list = field(default_factory=list)
+    # popup_context() per feature, aligned the same way
+    popup_contexts: list = field(default_factory=list)
+
+def summarize(features):
+    """Collect the latest period, areas, and per-field latest predictions and popup values."""
+    summary = FeatureSummary()
+    # Raw (start, end) of the latest valid period; formatted once at the end
+    latest_ts = (0, 0)
+    areas = []
     
     for feature in features:
-        predictions = feature.get("properties", {}).get("monitoring_prediction", [])
+        props = feature.get("properties", {})
+        predictions = props.get("monitoring_prediction", [])
+        areas.append(props.get("area_sq_m", 0))
+        
+        latest_pred = None
         for pred in predictions:
             start_ts = pred.get("start_timestamp_sec", 0)
             end_ts = pred.get("end_timestamp_sec", 0)
             
-            if start_ts > max_timestamp and start_ts > 0 and end_ts > 0:
-                max_timestamp = start_ts
-                latest_period = {
-                    "period_key": f"{start_ts}_{end_ts}",
-                    "label": f"{timestamp_to_month_year(start_ts)} - {timestamp_to_month_year(end_ts)}",
-                    "start_ts": start_ts,
-                    "end_ts": end_ts
-                }
+            if latest_pred is None or start_ts > latest_pred.get("start_timestamp_sec", 0):
+                latest_pred = pred
+            
+            if start_ts > 0 and end_ts > 0 and (start_ts, end_ts) > latest_ts:
+                latest_ts = (start_ts, end_ts)
+        summary.latest_preds.append(latest_pred)
+        summary.popup_contexts.append(popup_context(feature, latest_pred))
     
-    return latest_period
+    # Area reductions run in NumPy rather than per element in Python
+    areas_np = np.asarray(areas, dtype=np.float64)
+    summary.total_area = float(areas_np.sum())
+    summary.avg_area = float(areas_np.mean()) if areas_np.size else 0.0
+    
+    start_ts, end_ts = latest_ts
+    if start_ts:
+        summary.latest_period = {
+            "period_key": f"{start_ts}_{end_ts}",
+            "label": f"{timestamp_to_month_year(start_ts)} - {timestamp_to_month_year(end_ts)}",
+            "start_ts": start_ts,
+            "end_ts": end_ts
+        }
+    
+    return summary
 
-def get_crop_color(crop_name):
-    """Get color for a crop type."""
+@functools.lru_cache(maxsize=128)
+def get_crop_class(crop_name):
+    """Get the crop_css() class for a crop type (memoized; most fields share a crop)."""
     crop_upper = crop_name.upper().replace(" ", "_")
-    return CROP_COLORS.get(crop_upper, "#666666")
+    return _crop_css_class(crop_upper) if crop_upper in CROP_COLORS else "crop-other"
 
-def create_feature_popup(feature, use_latest=True):
-    """Create HTML popup content for a feature."""
-    props = feature.get("properties", {})
-    predictions = props.get("monitoring_prediction", [])
-    
-    # Get the latest prediction for this field (or first available)
-    selected_pred = None
-    if predictions:
-        if use_latest:
-            # Find the prediction with the latest timestamp
-            selected_pred = max(predictions, key=lambda p: p.get("start_timestamp_sec", 0))
-        else:
-            selected_pred = predictions[0]
-    
-    if not selected_pred:
-        return "No data available"
-    
-    crop_pred = selected_pred.get("crop_prediction", {})
-    
-    html = f"""
+# Field popup markup, filled per feature from a popup_context() dict.
+_POPUP_TEMPLATE = string.Template("""
     <div style="font-family: Arial; font-size: 12px; min-width: 250px;">
         <h4 style="margin: 0 0 10px 0; color: #2E7D32;">Field Information</h4>
         <table style="width: 100%; border-collapse: collapse;">
             <tr>
                 <td style="padding: 4px; font-weight: bold;">Field ID:</td>
-                <td style="padding: 4px;">{feature.get('id', 'N/A')}</td>
+                <td style="padding: 4px;">$field_id</td>
             </tr>
             <tr>
                 <td style="padding: 4px; font-weight: bold;">Area:</td>
-                <td style="padding: 4px;">{props.get('area_sq_m', 0):.2f} m²</td>
+                <td style="padding: 4px;">$area m²</td>
             </tr>
             <tr style="background-color: #f0f0f0;">
                 <td style="padding: 4px; font-weight: bold;">Season:</td>
-                <td style="padding: 4px;">{timestamp_to_month_year(selected_pred.get('start_timestamp_sec'))} - {timestamp_to_month_year(selected_pred.get('end_timestamp_sec'))}</td>
+                <td style="padding: 4px;">$season_start - $season_end</td>
             </tr>
             <tr>
                 <td colspan="2" style="padding: 8px 4px 4px 4px; font-weight: bold; color: #1976D2;">Primary Crop:</td>
             </tr>
             <tr>
                 <td style="padding: 4px; padding-left: 20px;">Crop:</td>
-                <td style="padding: 4px;">{crop_pred.get('crop_1', 'N/A')}</td>
+                <td style="padding: 4px;">$crop_1</td>
             </tr>
             <tr>
                 <td style="padding: 4px; padding-left: 20px;">Confidence:</td>
-                <td style="padding: 4px;">{crop_pred.get('conf_1', 0):.2%}</td>
+                <td style="padding: 4px;">$conf_1</td>
             </tr>
             <tr style="background-color: #f0f0f0;">
                 <td colspan="2" style="padding: 8px 4px 4px 4px; font-weight: bold; color: #1976D2;">Secondary Crop:</td>
             </tr>
             <tr style="background-color: #f0f0f0;">
                 <td style="padding: 4px; padding-left: 20px;">Crop:</td>
-                <td style="padding: 4px;">{crop_pred.get('crop_2', 'N/A')}</td>
+                <td style="padding: 4px;">$crop_2</td>
             </tr>
             <tr style="background-color: #f0f0f0;">
                 <td style="padding: 4px; padding-left: 20px;">Confidence:</td>
-                <td style="padding: 4px;">{crop_pred.get('conf_2', 0):.2%}</td>
+                <td style="padding: 4px;">$conf_2</td>
             </tr>
         </table>
     </div>
-    """
-    return html
+    """)
+
+def popup_context(feature, selected_pred):
+    """Flat, pre-formatted popup values for a feature, or None without a prediction."""
+    if not selected_pred:
+        return None
+    
+    props = feature.get("properties", {})
+    crop_pred = selected_pred.get("crop_prediction", {})
+    return {
+        "field_id": feature.get("id", "N/A"),
+        "area": f"{props.get('area_sq_m', 0):.2f}",
+        "season_start": timestamp_to_month_year(selected_pred.get("start_timestamp_sec")),
+        "season_end": timestamp_to_month_year(selected_pred.get("end_timestamp_sec")),
+        "crop_1": crop_pred.get("crop_1", "N/A"),
+        "conf_1": f"{crop_pred.get('conf_1', 0):.2%}",
+        "crop_2": crop_pred.get("crop_2", "N/A"),
+        "conf_2": f"{crop_pred.get('conf_2', 0):.2%}",
+    }
+
+def create_feature_popup(ctx):
+    """Create HTML popup content from a popup_context() dict."""
+    if ctx is None:
+        return "No data available"
+    return _POPUP_TEMPLATE.substitute(ctx)
 
-def create_map(geojson_data, cell_id_input, use_latest=True):
+@st.cache_data(show_spinner=False)
+def s2_center(cell_id_str):
+    """Return the (lat, lng) center of an S2 cell id string, in degrees."""
+    # Convert the string input (e.g., "3486736072451293184") to an integer, then to CellId
+    cell_id = int(cell_id_str)
+    if s2geometry is not None:
+        lat_lng = s2geometry.S2CellId(cell_id).ToLatLng()
+        return lat_lng.lat().degrees(), lat_lng.lng().degrees()
+    lat_lng = s2sphere.CellId(cell_id).to_lat_lng()
+    return lat_lng.lat().degrees, lat_lng.lng().degrees
+
+def create_map(geojson_data, cell_id_input, summary):
     """Create a Folium map with the GeoJSON data."""
     features = geojson_data.get("features", [])
     
@@ -184,13 +341,7 @@ def create_map(geojson_data, cell_id_input, use_latest=True):
     
     # --- FIX START: Convert S2 Cell ID string to Lat/Lng ---
     try:
-        # Convert the string input (e.g., "3486736072451293184") to an integer, then to CellId
-        cell_id_obj = s2sphere.CellId(int(cell_id_input))
-        lat_lng = cell_id_obj.to_lat_lng()
-        
-        # Convert to degrees
-        center_lat = lat_lng.lat().degrees
-        center_lon = lat_lng.lng().degrees
+        center_lat, center_lon = s2_center(cell_id_input)
     except ValueError:
         st.error("Invalid S2 Cell ID format. Please ensure it is a numeric ID.")
         return None
@@ -202,67 +353,65 @@ def create_map(geojson_data, cell_id_input, use_latest=True):
     # Create map
     m = folium.Map(location=[center_lat, center_lon], zoom_start=13, tiles="OpenStreetMap")
     
-    # Add features to map
-    for feature in features:
+    # Tag each feature with its fill color and popup HTML in a single pass so
+    # the whole collection renders as one GeoJson layer.
+    tagged_features = []
+    for i, (feature, latest_pred, ctx) in enumerate(zip(features, summary.latest_preds, summary.popup_contexts)):
         props = feature.get("properties", {})
-        predictions = props.get("monitoring_prediction", [])
         
-        # Get the latest prediction for this specific field
+        # Latest prediction for this field was picked in summarize()
         crop_name = "NO_PREDICTION"
-        if predictions:
-            latest_pred = max(predictions, key=lambda p: p.get("start_timestamp_sec", 0))
+        if latest_pred:
             crop_pred = latest_pred.get("crop_prediction", {})
             crop_name = crop_pred.get("crop_1", "NO_PREDICTION")
         
-        # Get color
-        color = get_crop_color(crop_name)
-        
-        # Create popup
-        popup_html = create_feature_popup(feature, use_latest=True)
-        popup = folium.Popup(popup_html, max_width=350)
-        
-        # Add to map
-        folium.GeoJson(
-            feature,
-            style_function=lambda x, color=color: {
-                'fillColor': color,
-                'color': 'black',
-                'weight': 1,
-                'fillOpacity': 0.6
+        tagged_features.append({
+            **feature,
+            # Unique ids make folium key its style lookup on feature.id rather
+            # than the first unique string property (the popup HTML). The
+            # original id is still shown in the popup.
+            "id": str(i),
+            "properties": {
+                **props,
+                "_crop_class": get_crop_class(crop_name),
+                "_popup_html": create_feature_popup(ctx),
             },
-            popup=popup
-        ).add_to(m)
+        })
     
-    # Add legend
-    legend_html = '''
-    <div style="position: fixed; 
-                bottom: 50px; right: 50px; width: 200px; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:14px; padding: 10px">
-    <h4 style="margin-top:0;">Crop Legend</h4>
-    '''
-    
-    for crop, color in CROP_COLORS.items():
-        crop_display = crop.replace("_", " ").title()
-        legend_html += f'<p><span style="background-color:{color}; width:20px; height:20px; display:inline-block; border:1px solid black;"></span> {crop_display}</p>'
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": tagged_features},
+        style_function=lambda f: {
+            'className': f["properties"]["_crop_class"],
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.6
+        },
+        popup=folium.GeoJsonPopup(fields=["_popup_html"], labels=False, max_width=350)
+    ).add_to(m)
     
-    legend_html += '</div>'
-    m.get_root().html.add_child(folium.Element(legend_html))
+    # Add crop fill stylesheet and legend
+    m.get_root().header.add_child(folium.Element(crop_css()))
+    m.get_root().html.add_child(folium.Element(legend_html()))
     
     return m
 
-def prepare_csv_data(geojson_data):
-    """Prepare data for CSV export."""
-    features = geojson_data.get("features", [])
-    rows = []
-    
+CSV_FIELDNAMES = [
+    "Field_ID", "Area_sqm", "ALU_Type", "Class_Confidence",
+    "Season_Start", "Season_End",
+    "Primary_Crop", "Primary_Confidence",
+    "Secondary_Crop", "Secondary_Confidence",
+    "Tertiary_Crop", "Tertiary_Confidence"
+]
+
+def iter_rows(features):
+    """Yield one CSV row dict per field prediction."""
     for feature in features:
         props = feature.get("properties", {})
         predictions = props.get("monitoring_prediction", [])
         
         for pred in predictions:
             crop_pred = pred.get("crop_prediction", {})
-            row = {
+            yield {
                 "Field_ID": feature.get("id", ""),
                 "Area_sqm": props.get("area_sq_m", 0),
                 "ALU_Type": props.get("alu_type", ""),
@@ -276,37 +425,78 @@ def prepare_csv_data(geojson_data):
                 "Tertiary_Crop": crop_pred.get("crop_3", ""),
                 "Tertiary_Confidence": crop_pred.get("conf_3", 0)
             }
-            rows.append(row)
-    
-    return pd.DataFrame(rows)
+
+def prepare_csv_data(geojson_data):
+    """Prepare CSV text for export, streaming rows straight to the writer."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDNAMES, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(iter_rows(geojson_data.get("features", [])))
+    return buf.getvalue()
+
+def response_id(api_response):
+    """Content hash of the full API response, used as a cache key."""
+    if orjson is not None:
+        payload = orjson.dumps(api_response, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(api_response, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+# The payload is passed underscored so Streamlit keys these caches on resp_id
+# alone instead of hashing the whole response on every rerun.
+@st.cache_data(show_spinner=False, max_entries=8)
+def _csv_of(resp_id, _geojson_data):
+    """CSV export text for a response, built once per resp_id."""
+    return prepare_csv_data(_geojson_data)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _pretty_json(resp_id, _resp):
+    """Indented raw-response JSON, built once per resp_id."""
+    return json_dumps_pretty(_resp)
 
 # --- Main App Logic ---
 
 # Initialize session state
 if "geojson_data" not in st.session_state:
     st.session_state.geojson_data = None
-if "latest_period" not in st.session_state:
-    st.session_state.latest_period = None
+if "summary" not in st.session_state:
+    st.session_state.summary = None
 if "raw_response" not in st.session_state:
     st.session_state.raw_response = None
+if "response_id" not in st.session_state:
+    st.session_state.response_id = None
+if "map_key" not in st.session_state:
+    st.session_state.map_key = None
+    st.session_state.map_html = None
 
 # Fetch data when button is clicked
 if fetch_button:
     if not api_key:
         st.error("Please enter an API key.")
     else:
+        # Drop the previous fetch so nothing derived from it outlives a failed
+        # fetch or gets cached under the new response's id
+        st.session_state.raw_response = None
+        st.session_state.response_id = None
+        st.session_state.geojson_data = None
+        st.session_state.summary = None
+        st.session_state.map_key = None
+        st.session_state.map_html = None
+        
         api_response = fetch_agri_data(api_key, s2_cell_id)
         if api_response:
             st.session_state.raw_response = api_response
+            st.session_state.response_id = response_id(api_response)
             geojson_data = parse_geojson_data(api_response)
             if geojson_data:
                 st.session_state.geojson_data = geojson_data
                 features = geojson_data.get("features", [])
-                st.session_state.latest_period = get_latest_time_period(features)
+                st.session_state.summary = summarize(features)
                 st.success(f"Data fetched successfully! Found {len(features)} fields.")
 
 # Display map and controls if data is available
-if st.session_state.geojson_data and st.session_state.latest_period:
+if st.session_state.geojson_data and st.session_state.summary and st.session_state.summary.latest_period:
+    summary = st.session_state.summary
     
     # Display selected time period
     col1, col2 = st.columns([3, 1])
@@ -316,24 +506,26 @@ if st.session_state.geojson_data and st.session_state.latest_period:
     
     with col2:
         # Download button
-        csv_data = prepare_csv_data(st.session_state.geojson_data)
-        csv = csv_data.to_csv(index=False)
+        csv_data = _csv_of(st.session_state.response_id, st.session_state.geojson_data)
         st.download_button(
             label="📥 Download CSV",
-            data=csv,
+            data=csv_data,
             file_name=f"agri_landscape_{s2_cell_id}.csv",
             mime="text/csv",
             use_container_width=True
         )
     
-    # --- FIX START: Correct arguments passed to create_map ---
-    # 1. First argument is geojson_data (matching function def)
-    # 2. Second argument is s2_cell_id (the actual variable from inputs)
-    folium_map = create_map(st.session_state.geojson_data, s2_cell_id, use_latest=True)
-    # --- FIX END ---
+    # Rebuild the map only when the cell or the fetched data changes; other
+    # widget reruns reuse the rendered HTML from session state.
+    map_key = hashlib.md5(f"{s2_cell_id}:{st.session_state.response_id}".encode()).hexdigest()
+    if st.session_state.map_key != map_key:
+        folium_map = create_map(st.session_state.geojson_data, s2_cell_id, summary)
+        st.session_state.map_html = folium_map.get_root().render() if folium_map else None
+        # Leave failed builds unkeyed so the next rerun retries and re-reports
+        st.session_state.map_key = map_key if folium_map else None
     
-    if folium_map:
-        st_folium(folium_map, width=1400, height=600)
+    if st.session_state.map_html:
+        components.html(st.session_state.map_html, height=600)
     
     # Display statistics
     st.subheader("📊 Summary Statistics")
@@ -343,11 +535,9 @@ if st.session_state.geojson_data and st.session_state.latest_period:
     with col1:
         st.metric("Total Fields", len(features))
     with col2:
-        total_area = sum(f.get("properties", {}).get("area_sq_m", 0) for f in features)
-        st.metric("Total Area", f"{total_area:.2f} m²")
+        st.metric("Total Area", f"{summary.total_area:.2f} m²")
     with col3:
-        avg_area = total_area / len(features) if features else 0
-        st.metric("Avg Field Area", f"{avg_area:.2f} m²")
+        st.metric("Avg Field Area", f"{summary.avg_area:.2f} m²")
     
     # Display Raw JSON Response
     st.markdown("---")
@@ -355,11 +545,16 @@ if st.session_state.geojson_data and st.session_state.latest_period:
     
     with st.expander("View Raw JSON Data", expanded=False):
         if st.session_state.raw_response:
-            # Pretty print JSON
-            st.json(st.session_state.raw_response)
+            # Serialized once per response; reruns reuse the cached string
+            json_str = _pretty_json(st.session_state.response_id, st.session_state.raw_response)
+            
+            # Pretty print JSON as plain text (st.json builds a heavy interactive
+            # tree), truncated so huge responses don't freeze the browser
+            st.code(json_str[:RAW_JSON_PREVIEW_CHARS], language="json")
+            if len(json_str) > RAW_JSON_PREVIEW_CHARS:
+                st.caption("Preview truncated — download the raw JSON for the full response.")
             
             # Add download button for raw JSON
-            json_str = json.dumps(st.session_state.raw_response, indent=2)
             st.download_button(
                 label="📥 Download Raw JSON",
                 data=json_str,
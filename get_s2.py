@@ -1,6 +1,12 @@
 import streamlit as st
 import leafmap.foliumap as leafmap
-import s2sphere
+
+# Prefer the compiled S2 bindings; fall back to the pure-Python port
+try:
+    import s2geometry
+except ImportError:
+    s2geometry = None
+    import s2sphere
 
 st.set_page_config(page_title="S2 Cell Finder", layout="centered")
 
@@ -10,11 +16,17 @@ st.markdown("Click anywhere on the map to get the **Level 13 S2 Cell ID**.")
 # --- Helper Function: S2 Calculation ---
 def get_s2_cell_info(lat, lng, level=13):
     """Calculates S2 Cell ID from Lat/Long."""
-    p = s2sphere.LatLng.from_degrees(lat, lng)
-    cell = s2sphere.CellId.from_lat_lng(p).parent(level)
+    if s2geometry is not None:
+        p = s2geometry.S2LatLng.FromDegrees(lat, lng)
+        cell = s2geometry.S2CellId(p).parent(level)
+        token = cell.ToToken()
+    else:
+        p = s2sphere.LatLng.from_degrees(lat, lng)
+        cell = s2sphere.CellId.from_lat_lng(p).parent(level)
+        token = cell.to_token()
     return {
         "id_int": str(cell.id()),
-        "id_token": cell.to_token(),
+        "id_token": token,
         "level": level
     }
 